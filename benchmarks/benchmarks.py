@@ -1,9 +1,29 @@
-"""Two sample benchmarks to compute runtime and memory usage.
+"""Benchmarks of runtime and memory usage.
+
+Besides the two sample benchmarks, there are suites for the task graph of
+a whole DR, import times, light curve server lookups and object-source
+synchronization.
 
 For more information on writing benchmarks:
 https://asv.readthedocs.io/en/stable/writing_benchmarks.html."""
 
+import pickle
+from pathlib import Path
+
+import dask
+import numpy as np
+import pandas as pd
+
+from load_ztfdr_for_tape.columns import NEPOCHS_COLUMN, OBJECT_COLUMNS
+from load_ztfdr_for_tape.dask import (derive_dd_divisions,
+                                      load_frame_from_path,
+                                      load_object_source_frames_from_path)
 from load_ztfdr_for_tape.oid import OIDParts
+from load_ztfdr_for_tape.pandas import load_object_df
+from load_ztfdr_for_tape.server import LightCurveStore
+from load_ztfdr_for_tape.sync import sync_object_source_frames
+
+TEST_DATA = Path(__file__).parent.parent / 'tests' / 'data' / 'lc_dr19'
 
 
 def time_computation():
@@ -14,3 +34,128 @@ def time_computation():
 def mem_list():
     """Memory computations are prefixed with 'mem' or 'peakmem'."""
     OIDParts.from_oid(687311400069813)
+
+
+def synthetic_paths(n):
+    """Generate n valid ZTF DR file paths, the files do not exist."""
+    paths = []
+    field = 0
+    while len(paths) < n:
+        field += 1
+        for ccdid in range(1, 17):
+            for qid in range(1, 5):
+                paths.append(
+                    f'/data/lc_dr19/{field // 1000}/field{field:06d}/'
+                    f'ztf_{field:06d}_zg_c{ccdid:02d}_q{qid}_dr19.parquet'
+                )
+    return paths[:n]
+
+
+class WholeDRGraph:
+    """Graph construction and size of a frame with a partition per file."""
+
+    params = [10_000, 100_000]
+    param_names = ['n_partitions']
+    timeout = 300
+
+    def __init__(self):
+        self.ordered_paths = []
+        self.divisions = ()
+        self.meta = None
+
+    def setup(self, n_partitions):
+        """Generate paths, divisions and meta"""
+        self.ordered_paths = synthetic_paths(n_partitions)
+        self.divisions = derive_dd_divisions(self.ordered_paths)
+        # Do not read files to infer meta
+        self.meta = pd.DataFrame({column: pd.Series([], dtype=float) for column in OBJECT_COLUMNS})
+
+    def build(self):
+        """Build the frame"""
+        return load_frame_from_path(
+            load_object_df,
+            ordered_paths=self.ordered_paths,
+            divisions=self.divisions,
+            meta=self.meta,
+            enforce_metadata=False,
+        )
+
+    def time_build_graph(self, _n_partitions):
+        """Time to build the frame, including the task graph"""
+        self.build()
+
+    def track_graph_serialized_size(self, _n_partitions):
+        """Size of the task graph pickled task by task, like it is sent to a scheduler"""
+        graph = self.build().__dask_graph__()
+        return sum(len(pickle.dumps(task)) for task in dict(graph).values())
+
+    track_graph_serialized_size.unit = 'bytes'  # type: ignore
+
+
+def timeraw_import_path_utilities():
+    """Import time of OID and file path utilities, they must not import loader dependencies"""
+    return """
+    from load_ztfdr_for_tape.filepath import ParsedDataFilePath
+    from load_ztfdr_for_tape.oid import OIDParts
+    """
+
+
+def timeraw_import_package():
+    """Import time of the package, loaders are imported lazily"""
+    return "import load_ztfdr_for_tape"
+
+
+def timeraw_import_loaders():
+    """Import time of the package with the loaders"""
+    return "from load_ztfdr_for_tape import load_object_source_frames_from_path"
+
+
+class LightCurveStoreLookup:
+    """Single OID lookups of the light curve server store, on the test data."""
+
+    def __init__(self):
+        self.oids = []
+        self.warm_store = None
+
+    def setup(self):
+        """Sample OIDs and warm up the store caches"""
+        paths = TEST_DATA.glob('**/*.parquet')
+        oids = np.concatenate([load_object_df(path).index.to_numpy() for path in paths])
+        self.oids = [int(oid) for oid in np.random.default_rng(0).choice(oids, 100)]
+        self.warm_store = LightCurveStore(TEST_DATA)
+        self.warm_store.get_many(self.oids)
+
+    def time_cold_lookup(self):
+        """Lookup with empty caches, includes footer parsing and row group decoding"""
+        LightCurveStore(TEST_DATA).get(self.oids[0])
+
+    def time_warm_lookups(self):
+        """100 lookups served from the caches"""
+        for oid in self.oids:
+            self.warm_store.get(oid)
+
+
+class ObjectSourceSync:
+    """Propagate an object filter to sources and recompute nepochs, on the test data."""
+
+    def __init__(self):
+        self.objects = None
+        self.sources = None
+
+    def setup(self):
+        """Load the frames and filter objects"""
+        objects, self.sources = load_object_source_frames_from_path(TEST_DATA)
+        self.objects = objects[objects[NEPOCHS_COLUMN] > 10]
+
+    def time_partition_local_sync(self):
+        """Partition-local sync relying on the shared divisions"""
+        dask.compute(*sync_object_source_frames(self.objects, self.sources))
+
+    def time_shuffle_sync(self):
+        """Global join, like for frames with unknown divisions"""
+        objects = self.objects.clear_divisions()
+        sources = self.sources.clear_divisions()
+        synced_sources = sources.join(objects[[]], how='inner', shuffle='tasks')
+        nepochs = synced_sources.groupby(synced_sources.index).size().rename(NEPOCHS_COLUMN).to_frame()
+        synced_objects = objects.drop(columns=[NEPOCHS_COLUMN]).join(nepochs, how='left', shuffle='tasks')
+        dask.compute(synced_objects, synced_sources)
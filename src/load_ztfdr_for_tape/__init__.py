@@ -1 +1,61 @@
-from .dask import *  # noqa
+"""Get Dask DataFrames from ZTF DRs for LINCC Frameworks' Tape.
+
+Loaders and submodules are imported lazily on the first access, so
+processes which use only OID and file path utilities do not import dask,
+pandas and polars.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from load_ztfdr_for_tape.dask import (load_object_frame,
+                                          load_object_source_frames_by_healpix,
+                                          load_object_source_frames_from_path,
+                                          load_source_frame)
+
+__all__ = [
+    "load_object_frame",
+    "load_source_frame",
+    "load_object_source_frames_from_path",
+    "load_object_source_frames_by_healpix",
+]
+
+
+_LAZY_ATTRIBUTES = {name: 'load_ztfdr_for_tape.dask' for name in __all__}
+"""Names of the lazily imported attributes and modules to import them from."""
+
+_SUBMODULES = (
+    'bands',
+    'checkpoint',
+    'columns',
+    'dask',
+    'filepath',
+    'healpix',
+    'layout',
+    'oid',
+    'padded',
+    'pandas',
+    'relayout',
+    'server',
+    'sync',
+)
+"""Names of the lazily imported submodules."""
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        # Importing a submodule binds it as an attribute of the package
+        return import_module(f'{__name__}.{name}')
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+    value = getattr(import_module(module_name), name)
+    # Cache it, so __getattr__ is not called again
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULES))
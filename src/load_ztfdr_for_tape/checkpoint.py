@@ -0,0 +1,128 @@
+"""Checkpointed, resumable computations over a whole ZTF DR.
+
+`run_checkpointed` maps a function over the OID-ordered partitions of the
+"object" and "source" frames, and writes the result of each partition into
+a results directory as soon as it is ready. Results are keyed by the data
+file name, so a restarted run skips partitions which are already done.
+"""
+
+import os
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Union
+
+import dask
+import pandas as pd
+
+from load_ztfdr_for_tape.dask import (get_ordered_paths_and_divisions,
+                                      get_source_loader_and_paths)
+from load_ztfdr_for_tape.layout import temporary_path
+from load_ztfdr_for_tape.pandas import load_object_df
+
+__all__ = ['result_path', 'run_checkpointed']
+
+
+PathType = Union[str, Path]
+
+
+def run_checkpointed(
+        func: Callable[[pd.DataFrame, pd.DataFrame], pd.DataFrame],
+        path: Union[Iterable[PathType], PathType],
+        results_dir: PathType,
+        *,
+        max_concurrency: int = 4,
+        scheduler: Optional[str] = None,
+) -> List[Path]:
+    """Apply a function to each partition of a ZTF DR and save the results.
+
+    Each partition corresponds to a single data file, its result is written
+    atomically into `results_dir` under the data file name, see
+    `result_path`. Partitions with existing results are skipped, so an
+    interrupted run can be restarted with the same arguments to redo only
+    the unfinished partitions. If `func` fails on any partition, no new
+    partitions are started, results of those already running are still
+    saved, and the exception is re-raised. The same applies if the run is
+    interrupted, for example with Ctrl-C.
+
+    Parameters
+    ----------
+    func : function of (pd.DataFrame, pd.DataFrame) -> pd.DataFrame
+        Function to apply, its signature is
+        `fn(objects: pd.DataFrame, sources: pd.DataFrame) -> pd.DataFrame`,
+        it gets "object" and "source" tables of the same partition, see
+        `load_object_source_frames_from_path`.
+    path : single path or iterable of paths
+        Path to the datafile or files to load. If a single path is given, it
+        should be a directory of `.parquet` files. If an iterator is given, it
+        should yield paths to `.parquet` files.
+    results_dir : str or Path
+        Directory to write the results to. It must be accessible by all the
+        Dask workers.
+    max_concurrency : int
+        Maximum number of partitions to process at the same time.
+    scheduler : str or None
+        Dask scheduler to use for each partition, for example "sync".
+        Default Dask scheduler is used if `None`, which is the distributed
+        client if one is active.
+
+    Returns
+    -------
+    list of Path
+        Paths to the results of all partitions, in OID order.
+    """
+    if max_concurrency < 1:
+        raise ValueError(f'max_concurrency must be positive, got {max_concurrency}')
+    results_dir = Path(results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+
+    ordered_paths, _divisions = get_ordered_paths_and_divisions(path)
+    source_func, source_paths = get_source_loader_and_paths(path, ordered_paths)
+    targets = [result_path(results_dir, data_path) for data_path in ordered_paths]
+
+    # Each task has its own small graph, so it doesn't carry the other partitions
+    load_objects = dask.delayed(load_object_df)
+    load_sources = dask.delayed(source_func)
+    apply_and_write = dask.delayed(_apply_and_write)
+    tasks = [
+        apply_and_write(func, load_objects(data_path), load_sources(source_path), target)
+        for data_path, source_path, target in zip(ordered_paths, source_paths, targets)
+        if not target.exists()
+    ]
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        futures = [executor.submit(dask.compute, task, scheduler=scheduler) for task in tasks]
+        done, _not_done = wait(futures, return_when=FIRST_EXCEPTION)
+    finally:
+        # Don't start queued partitions after a failure or an interruption
+        executor.shutdown(wait=True, cancel_futures=True)
+    for future in done:
+        # Re-raise the exception if any
+        future.result()
+
+    return targets
+
+
+def result_path(results_dir: PathType, data_path: PathType) -> Path:
+    """Path to the result of the partition corresponding to a data file.
+
+    The result file has the same name as the data file, so it can be parsed
+    with `load_ztfdr_for_tape.filepath.ParsedDataFilePath`.
+    """
+    return Path(results_dir) / Path(data_path).name
+
+
+def _apply_and_write(
+        func: Callable[[pd.DataFrame, pd.DataFrame], pd.DataFrame],
+        objects: pd.DataFrame,
+        sources: pd.DataFrame,
+        target: Path,
+) -> None:
+    result = func(objects, sources)
+    tmp_path = temporary_path(target)
+    try:
+        result.to_parquet(tmp_path)
+        os.replace(tmp_path, target)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
@@ -1,10 +1,22 @@
 ID_COLUMN = 'objectid'
 """Name of the primary index column."""
 
+RA_COLUMN = 'objra'
+"""Name of the object right ascension column, degrees."""
+
+DEC_COLUMN = 'objdec'
+"""Name of the object declination column, degrees."""
+
+NEPOCHS_COLUMN = 'nepochs'
+"""Name of the object column with the number of detections."""
+
 # We skip 'filterid' and use it for the source table instead.
-OBJECT_COLUMNS = ('fieldid', 'rcid', 'objra', 'objdec', 'nepochs')
+OBJECT_COLUMNS = ('fieldid', 'rcid', RA_COLUMN, DEC_COLUMN, NEPOCHS_COLUMN)
 """Names of the columns representing the object metadata."""
 
+HEALPIX_COLUMN = 'healpix'
+"""Name of the optional column with NESTED HEALPix pixel number of the object."""
+
 TIME_DOMAIN_COLUMNS = ('hmjd', 'mag', 'magerr', 'clrcoeff', 'catflags')
 """Names of the columns representing photometric data, they are nested arrays."""
 
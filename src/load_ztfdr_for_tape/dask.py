@@ -1,21 +1,36 @@
 """Functions for loading ZTF DR data into Dask dataframes."""
 
+import os
+from functools import partial
 from pathlib import Path
 from typing import Callable, Iterable, List, Optional, Tuple, Union, cast
 
 import dask.dataframe as dd
 import pandas as pd
 
-from load_ztfdr_for_tape.filepath import ParsedDataFilePath, order_paths_by_oid
-from load_ztfdr_for_tape.pandas import load_object_df, load_source_df
+from load_ztfdr_for_tape.columns import HEALPIX_COLUMN, ID_COLUMN
+from load_ztfdr_for_tape.filepath import ParsedDataFilePath, get_ordered_paths
+from load_ztfdr_for_tape.healpix import healpix_npix
+from load_ztfdr_for_tape.layout import OptimizedLayout
+from load_ztfdr_for_tape.pandas import (load_exploded_source_df,
+                                        load_object_df, load_source_df)
 
-__all__ = ["load_object_frame", "load_source_frame", "load_object_source_frames_from_path"]
+__all__ = [
+    "load_object_frame",
+    "load_source_frame",
+    "load_object_source_frames_from_path",
+    "load_object_source_frames_by_healpix",
+]
 
 
 PathType = Union[str, Path]
 
 
-def load_object_frame(path: Union[Iterable[PathType], PathType]) -> dd.DataFrame:
+def load_object_frame(
+        path: Union[Iterable[PathType], PathType],
+        *,
+        healpix_order: Optional[int] = None,
+) -> dd.DataFrame:
     """Load the "object" dataframe from a ZTF DR datafile.
 
     It loads all the columns but those that represent light curves.
@@ -26,6 +41,9 @@ def load_object_frame(path: Union[Iterable[PathType], PathType]) -> dd.DataFrame
         Path to the datafile or files to load. If a single path is given, it
         should be a directory of `.parquet` files. If an iterator is given, it
         should yield paths to `.parquet` files.
+    healpix_order : int or None
+        If given, add `HEALPIX_COLUMN` column with NESTED HEALPix pixel
+        numbers of this order.
 
     Returns
     -------
@@ -34,10 +52,11 @@ def load_object_frame(path: Union[Iterable[PathType], PathType]) -> dd.DataFrame
     """
     ordered_paths, divisions = get_ordered_paths_and_divisions(path)
     return load_frame_from_path(
-        load_object_df,
+        partial(load_object_df, healpix_order=healpix_order),
         ordered_paths=ordered_paths,
         divisions=divisions,
         meta=None,
+        enforce_metadata=False,
     )
 
 
@@ -58,12 +77,13 @@ def load_source_frame(path: Union[Iterable[PathType], PathType]) -> dd.DataFrame
     dd.DataFrame
         A lazily loaded Dask dataframe with the "source" table.
     """
-    ordered_paths, divisions = get_ordered_paths_and_divisions(path)
+    func, ordered_paths, divisions = get_source_loader_paths_and_divisions(path)
     return load_frame_from_path(
-        load_source_df,
+        func,
         ordered_paths=ordered_paths,
         divisions=divisions,
         meta=None,
+        enforce_metadata=False,
     )
 
 
@@ -77,7 +97,9 @@ def get_ordered_paths_and_divisions(
     path :  single path or iterable of paths
         Path to the datafile or files to load. If a single path is given, it
         should be a directory of `.parquet` files. If an iterator is given, it
-        should yield paths to `.parquet` files.
+        should yield paths to `.parquet` files. If the directory is an
+        optimized layout written by `load_ztfdr_for_tape.relayout`, paths to
+        its nested files are taken from the manifest.
 
     Returns
     -------
@@ -88,18 +110,79 @@ def get_ordered_paths_and_divisions(
         n+1 integers for n paths. See
         https://docs.dask.org/en/latest/dataframe-design.html#partitions
     """
-    if isinstance(path, PathType.__args__):  # type: ignore
-        path = Path(path).glob('**/*.parquet')
-    path = cast(Iterable[PathType], path)
-
-    ordered_paths = order_paths_by_oid(path)
+    ordered_paths = get_ordered_paths(path)
     divisions = derive_dd_divisions(ordered_paths)
 
     return ordered_paths, divisions
 
 
-def load_object_source_frames_from_path(
+def get_source_loader_paths_and_divisions(
         path: Union[Iterable[PathType], PathType]
+) -> Tuple[Callable[[PathType], pd.DataFrame], List[PathType], Tuple[int, ...]]:
+    """Get a loader function, ordered paths and divisions for the "source" table.
+
+    If `path` is an optimized layout with pre-exploded source files, these
+    files are used, otherwise it is the same as
+    `get_ordered_paths_and_divisions` with `load_source_df` loader.
+
+    Parameters
+    ----------
+    path :  single path or iterable of paths
+        Path to the datafile or files to load. If a single path is given, it
+        should be a directory of `.parquet` files. If an iterator is given, it
+        should yield paths to `.parquet` files.
+
+    Returns
+    -------
+    function of Path or str -> pd.DataFrame
+        Function to load a single file.
+    list of Path or str
+        A list of paths ordered by OID.
+    tuple of int
+        A tuple of integers representing the divisions of a Dask dataframe.
+    """
+    ordered_paths, divisions = get_ordered_paths_and_divisions(path)
+    func, source_paths = get_source_loader_and_paths(path, ordered_paths)
+    return func, source_paths, divisions
+
+
+def get_source_loader_and_paths(
+        path: Union[Iterable[PathType], PathType],
+        ordered_paths: List[PathType],
+) -> Tuple[Callable[[PathType], pd.DataFrame], List[PathType]]:
+    """Get a loader function and paths for the "source" table.
+
+    Pre-exploded source files of an optimized layout have the same names as
+    the nested files, so the paths match `ordered_paths` one to one, and the
+    divisions are the same.
+
+    Parameters
+    ----------
+    path :  single path or iterable of paths
+        Path given to `get_ordered_paths_and_divisions`, it is used only to
+        detect an optimized layout, so one-shot iterators are fine.
+    ordered_paths : list of Path or str
+        Paths to the "object" table files ordered by OID, the output of
+        `get_ordered_paths_and_divisions`.
+
+    Returns
+    -------
+    function of Path or str -> pd.DataFrame
+        Function to load a single file.
+    list of Path or str
+        A list of paths ordered by OID.
+    """
+    if isinstance(path, PathType.__args__):  # type: ignore
+        layout = OptimizedLayout.from_dir(cast(PathType, path))
+        if layout is not None and layout.source_paths is not None:
+            return load_exploded_source_df, list(layout.source_paths)
+    return load_source_df, ordered_paths
+
+
+def load_object_source_frames_from_path(
+        path: Union[Iterable[PathType], PathType],
+        *,
+        healpix_order: Optional[int] = None,
 ) -> Tuple[dd.DataFrame, dd.DataFrame]:
     """Load the "object" and "source" dataframes from a ZTF DR datafile.
 
@@ -111,6 +194,9 @@ def load_object_source_frames_from_path(
         Path to the datafile or files to load. If a single path is given, it
         should be a directory of `.parquet` files. If an iterator is given, it
         should yield paths to `.parquet` files.
+    healpix_order : int or None
+        If given, add `HEALPIX_COLUMN` column with NESTED HEALPix pixel
+        numbers of this order to the "object" table.
 
     Returns
     -------
@@ -119,26 +205,119 @@ def load_object_source_frames_from_path(
     """
     ordered_paths, divisions = get_ordered_paths_and_divisions(path)
     object_frame = load_frame_from_path(
-        load_object_df,
+        partial(load_object_df, healpix_order=healpix_order),
         ordered_paths=ordered_paths,
         divisions=divisions,
         meta=None,
+        enforce_metadata=False,
     )
+    source_func, source_paths = get_source_loader_and_paths(path, ordered_paths)
     source_frame = load_frame_from_path(
-        load_source_df,
-        ordered_paths=ordered_paths,
+        source_func,
+        ordered_paths=source_paths,
         divisions=divisions,
         meta=None,
+        enforce_metadata=False,
     )
     return object_frame, source_frame
 
 
+def load_object_source_frames_by_healpix(
+        path: Union[Iterable[PathType], PathType],
+        *,
+        order: int,
+        partition_order: int,
+) -> Tuple[dd.DataFrame, dd.DataFrame]:
+    """Load the "object" and "source" dataframes partitioned by HEALPix.
+
+    Both dataframes are indexed by `HEALPIX_COLUMN`, NESTED HEALPix pixel
+    number of the object at `order`, and sorted by it and by object ID.
+    Each partition covers a single HEALPix pixel at `partition_order`, so
+    divisions are known and the same for any input, which makes joins with
+    other catalogs partitioned the same way partition-local. Note that the
+    number of partitions is `12 * 4**partition_order`, and partitions
+    outside of the ZTF DR footprint are empty.
+
+    Repartitioning requires a single shuffle of both tables.
+
+    Parameters
+    ----------
+    path : single path or iterable of paths
+        Path to the datafile or files to load. If a single path is given, it
+        should be a directory of `.parquet` files. If an iterator is given, it
+        should yield paths to `.parquet` files.
+    order : int
+        HEALPix order of the index.
+    partition_order : int
+        HEALPix order of the partitions, must not be larger than `order`.
+
+    Returns
+    -------
+    dd.DataFrame
+        A lazily loaded Dask dataframe with the "object" and "source" tables.
+    """
+    if partition_order > order:
+        raise ValueError(f'partition_order ({partition_order}) must not be larger than order ({order})')
+
+    ordered_paths, divisions = get_ordered_paths_and_divisions(path)
+    object_frame = load_frame_from_path(
+        partial(load_object_df, healpix_order=order),
+        ordered_paths=ordered_paths,
+        divisions=divisions,
+        meta=None,
+        enforce_metadata=False,
+    )
+    source_frame = load_frame_from_path(
+        partial(load_source_df, healpix_order=order),
+        ordered_paths=ordered_paths,
+        divisions=divisions,
+        meta=None,
+        enforce_metadata=False,
+    )
+
+    healpix_divisions = derive_healpix_divisions(order, partition_order)
+    return (
+        _set_healpix_index(object_frame, healpix_divisions),
+        _set_healpix_index(source_frame, healpix_divisions),
+    )
+
+
+def derive_healpix_divisions(order: int, partition_order: int) -> Tuple[int, ...]:
+    """Derive Dask Dataframe divisions for HEALPix-indexed dataframes.
+
+    Parameters
+    ----------
+    order : int
+        HEALPix order of the index.
+    partition_order : int
+        HEALPix order of the partitions, each partition covers a single pixel
+        of this order.
+
+    Returns
+    -------
+    Tuple[int]
+        A tuple of `12 * 4**partition_order + 1` integers.
+    """
+    step = healpix_npix(order) // healpix_npix(partition_order)
+    return tuple(range(0, healpix_npix(order) + 1, step))
+
+
+def _set_healpix_index(frame: dd.DataFrame, divisions: Tuple[int, ...]) -> dd.DataFrame:
+    frame = frame.reset_index().set_index(HEALPIX_COLUMN, divisions=list(divisions))
+    return frame.map_partitions(_sort_by_healpix_and_oid)
+
+
+def _sort_by_healpix_and_oid(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values([HEALPIX_COLUMN, ID_COLUMN], kind='stable')
+
+
 def load_frame_from_path(
         func: Callable[[PathType], pd.DataFrame],
         *,
         ordered_paths: Iterable[PathType],
         divisions: Tuple[int, ...],
-        meta: Optional[pd.DataFrame]
+        meta: Optional[pd.DataFrame],
+        enforce_metadata: bool = True,
 ) -> dd.DataFrame:
     """Load a dataframe from a ZTF DR datafile applying a function to files
 
@@ -146,7 +325,7 @@ def load_frame_from_path(
     ----------
     func : function of Path or str -> pd.DataFrame
         Function to apply to each file to load the dataframe. Its signature is
-        `fn(path: Path | str) -> pd.DataFrame`, so it gets a `Path` object pointing
+        `fn(path: Path | str) -> pd.DataFrame`, so it gets a path string pointing
         to a parquet file and should return a pandas dataframe.
     ordered_paths : iterable of Path or str
         Iterable of paths to parquet files ordered by OID. For example,
@@ -159,17 +338,29 @@ def load_frame_from_path(
         see this blog post for details
         https://blog.dask.org/2022/08/09/understanding-meta-keyword-argument
         If `None`, the schema will be inferred from the first file.
+    enforce_metadata : bool
+        Whether to check the schema of each partition against `meta`. If
+        `False`, partition tasks have a path string and `func` only, which
+        keeps the serialized graph compact for tens of thousands of files.
 
     Returns
     -------
     dd.DataFrame
         A lazily loaded Dask dataframe.
     """
+    # Path objects are larger than strings when pickled
+    paths = [os.fspath(path) for path in ordered_paths]
+    if len(paths) == 0:
+        raise ValueError('No paths given')
+    if meta is None:
+        meta = func(paths[0]).iloc[:0]
+
     return dd.from_map(
         func,
-        ordered_paths,
+        paths,
         meta=meta,
         divisions=divisions,
+        enforce_metadata=enforce_metadata,
     )
 
 
@@ -190,9 +381,11 @@ def derive_dd_divisions(ordered_paths: Iterable[PathType]) -> Tuple[int, ...]:
         https://docs.dask.org/en/latest/dataframe-design.html#partitions
     """
 
-    divisions = []
+    divisions: List[int] = []
     for path in ordered_paths:
         parsed_path = ParsedDataFilePath.from_path(path)
+        if len(divisions) > 0 and parsed_path.start_oid <= divisions[-1]:
+            raise ValueError(f'Paths must be unique and ordered by OID, got {path} out of order')
         divisions.append(parsed_path.start_oid)
     if len(divisions) == 0:
         raise ValueError('No paths given')
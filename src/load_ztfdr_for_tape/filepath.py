@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Iterable, List, Union
 
 from load_ztfdr_for_tape.bands import ZTF_BAND_NAMES
+from load_ztfdr_for_tape.layout import OptimizedLayout
 from load_ztfdr_for_tape.oid import OIDParts
 
 __all__ = ['ParsedDataFilePath', 'get_ordered_paths', 'order_paths_by_oid']
@@ -81,13 +82,23 @@ def order_paths_by_oid(paths: Iterable[Union[str, Path]]) -> List[Union[str, Pat
     return sorted(paths, key=lambda path: ParsedDataFilePath.from_path(path).start_oid)
 
 
-def get_ordered_paths(directory: Union[str, Path]) -> List[Union[str, Path]]:
-    """Get a list of paths in a directory ordered by their OID.
+def get_ordered_paths(directory: Union[Iterable[Union[str, Path]], str, Path]) -> List[Union[str, Path]]:
+    """Get a list of paths ordered by their OID.
 
-    It selects all parquet files and orders them in ascending order by their
-    OID. This is useful when needed to get a list of files of the while
-    ZTF DR in order of object IDs.
+    If a single path is given, it should be a directory: all parquet files
+    in it are selected and ordered in ascending order by their OID. This is
+    useful when needed to get a list of files of the while ZTF DR in order
+    of object IDs. If the directory is an optimized layout written by
+    `load_ztfdr_for_tape.relayout`, paths to its nested files are taken from
+    the manifest instead. If an iterable is given, its paths are ordered.
     """
+    if not isinstance(directory, (str, Path)):
+        return order_paths_by_oid(directory)
+
+    layout = OptimizedLayout.from_dir(directory)
+    if layout is not None:
+        return list(layout.nested_paths)
+
     ordered = order_paths_by_oid(Path(directory).glob('**/*.parquet'))
     if len(ordered) == 0:
         raise ValueError(f'No parquet files found in {directory}')
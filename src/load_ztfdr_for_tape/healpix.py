@@ -0,0 +1,106 @@
+"""Vectorized HEALPix pixel computation for the NESTED scheme.
+
+We implement it here to avoid a dependency on healpy or similar packages,
+the algorithm follows the reference HEALPix C++ implementation.
+"""
+
+from typing import Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+__all__ = ['MAX_HEALPIX_ORDER', 'healpix_npix', 'radec_to_healpix']
+
+
+MAX_HEALPIX_ORDER = 29
+"""Maximum supported HEALPix order, pixel numbers must fit into int64."""
+
+
+def healpix_npix(order: int) -> int:
+    """Number of HEALPix pixels at the given order."""
+    _check_order(order)
+    return 12 * 4 ** order
+
+
+def radec_to_healpix(order: int, ra: ArrayLike, dec: ArrayLike) -> np.ndarray:
+    """Compute NESTED HEALPix pixel numbers from equatorial coordinates.
+
+    Parameters
+    ----------
+    order : int
+        HEALPix order, nside is `2 ** order`.
+    ra : array-like
+        Right ascension in degrees.
+    dec : array-like
+        Declination in degrees.
+
+    Returns
+    -------
+    np.ndarray of int64
+        Pixel numbers in the NESTED scheme.
+    """
+    _check_order(order)
+
+    ra, dec = np.broadcast_arrays(np.asarray(ra, dtype=np.float64), np.asarray(dec, dtype=np.float64))
+    z = np.sin(np.radians(dec))
+    # In [0, 4)
+    tt = np.mod(np.radians(ra) / (0.5 * np.pi), 4.0)
+
+    face = np.empty(z.shape, dtype=np.int64)
+    ix = np.empty(z.shape, dtype=np.int64)
+    iy = np.empty(z.shape, dtype=np.int64)
+
+    equatorial = np.abs(z) <= 2.0 / 3.0
+    polar = ~equatorial
+    face[equatorial], ix[equatorial], iy[equatorial] = _equatorial_face_xy(
+        order, tt[equatorial], z[equatorial]
+    )
+    face[polar], ix[polar], iy[polar] = _polar_face_xy(order, tt[polar], z[polar])
+
+    return (face << (2 * order)) + _spread_bits(ix) + (_spread_bits(iy) << 1)
+
+
+def _equatorial_face_xy(order: int, tt: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Face number and x, y coordinates within the face for |z| <= 2/3."""
+    nside = 1 << order
+    temp1 = nside * (0.5 + tt)
+    temp2 = nside * 0.75 * z
+    jp = (temp1 - temp2).astype(np.int64)
+    jm = (temp1 + temp2).astype(np.int64)
+    ifp = jp >> order
+    ifm = jm >> order
+    face = np.where(ifp == ifm, ifp | 4, np.where(ifp < ifm, ifp, ifm + 8))
+    ix = jm & (nside - 1)
+    iy = nside - (jp & (nside - 1)) - 1
+    return face, ix, iy
+
+
+def _polar_face_xy(order: int, tt: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Face number and x, y coordinates within the face for |z| > 2/3."""
+    nside = 1 << order
+    ntt = np.minimum(tt.astype(np.int64), 3)
+    tp = tt - ntt
+    tmp = nside * np.sqrt(3.0 * (1.0 - np.abs(z)))
+    jp = np.minimum((tp * tmp).astype(np.int64), nside - 1)
+    jm = np.minimum(((1.0 - tp) * tmp).astype(np.int64), nside - 1)
+    north = z > 0
+    face = np.where(north, ntt, ntt + 8)
+    ix = np.where(north, nside - jm - 1, jp)
+    iy = np.where(north, nside - jp - 1, jm)
+    return face, ix, iy
+
+
+def _spread_bits(x: np.ndarray) -> np.ndarray:
+    """Interleave zero bits between the bits of x, x must be below 2**32."""
+    x = x.astype(np.uint64)
+    x = (x | (x << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x3333333333333333)
+    x = (x | (x << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return x.astype(np.int64)
+
+
+def _check_order(order: int) -> None:
+    if not 0 <= order <= MAX_HEALPIX_ORDER:
+        raise ValueError(f'HEALPix order must be between 0 and {MAX_HEALPIX_ORDER}, got {order}')
@@ -0,0 +1,144 @@
+"""Manifest of the optimized layout written by `load_ztfdr_for_tape.relayout`.
+
+This module has no heavy dependencies, so the layout can be detected by
+path utilities such as `load_ztfdr_for_tape.filepath.get_ordered_paths`.
+"""
+
+import json
+import os
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union, cast
+
+__all__ = [
+    'EXPLODED_DIRNAME',
+    'MANIFEST_FILENAME',
+    'NESTED_DIRNAME',
+    'LayoutFile',
+    'OptimizedLayout',
+    'RelayoutOptions',
+    'temporary_path',
+]
+
+
+MANIFEST_FILENAME = 'manifest.json'
+"""Name of the manifest file in the root directory of an optimized layout."""
+
+NESTED_DIRNAME = 'nested'
+"""Name of the subdirectory with the sorted nested files."""
+
+EXPLODED_DIRNAME = 'exploded'
+"""Name of the subdirectory with the pre-exploded source files."""
+
+LAYOUT_VERSION = 1
+"""Version of the manifest format."""
+
+
+@dataclass
+class RelayoutOptions:
+    """Options used to write an optimized layout."""
+
+    row_group_size: int = 10_000
+    """Number of objects per row group of the nested files."""
+    source_row_group_size: int = 1_000_000
+    """Number of detections per row group of the exploded source files."""
+    compression: str = 'zstd'
+    """Parquet compression codec."""
+    compression_level: Optional[int] = None
+    """Compression level, `None` for the codec's default."""
+    explode_sources: bool = False
+    """Whether to write pre-exploded source files."""
+
+
+@dataclass
+class LayoutFile:
+    """A single file of an optimized layout.
+
+    Paths are relative to the layout root directory.
+    """
+
+    path: str
+    num_rows: int
+    min_oid: Optional[int]
+    max_oid: Optional[int]
+    source_path: Optional[str] = None
+    num_sources: Optional[int] = None
+
+
+@dataclass
+class OptimizedLayout:
+    """Optimized layout written by `load_ztfdr_for_tape.relayout.relayout`.
+
+    `files` are ordered by OID.
+    """
+
+    root: Path
+    options: RelayoutOptions
+    files: List[LayoutFile]
+    complete: bool = True
+
+    @classmethod
+    def from_dir(
+            cls,
+            directory: Union[str, Path],
+            *,
+            allow_incomplete: bool = False,
+    ) -> Optional['OptimizedLayout']:
+        """Read the layout from the manifest, `None` if there is no manifest.
+
+        Raises `ValueError` if the manifest belongs to an unfinished run,
+        unless `allow_incomplete` is `True`.
+        """
+        root = Path(directory)
+        manifest_path = root / MANIFEST_FILENAME
+        if not manifest_path.is_file():
+            return None
+        with open(manifest_path, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+        if manifest['version'] != LAYOUT_VERSION:
+            raise ValueError(f'Unsupported manifest version {manifest["version"]} in {manifest_path}')
+        if not manifest['complete'] and not allow_incomplete:
+            raise ValueError(f'Optimized layout in {directory} is incomplete, re-run relayout to finish it')
+        return cls(
+            root=root,
+            options=RelayoutOptions(**manifest['options']),
+            files=[LayoutFile(**file) for file in manifest['files']],
+            complete=manifest['complete'],
+        )
+
+    def write_manifest(self) -> None:
+        """Write the manifest file atomically."""
+        manifest: Dict[str, Any] = {
+            'version': LAYOUT_VERSION,
+            'complete': self.complete,
+            'options': asdict(self.options),
+            'files': [asdict(file) for file in self.files],
+        }
+        manifest_path = self.root / MANIFEST_FILENAME
+        tmp_path = temporary_path(manifest_path)
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(manifest, fh, indent=1)
+        os.replace(tmp_path, manifest_path)
+
+    @property
+    def nested_paths(self) -> List[Path]:
+        """Paths to the nested files, ordered by OID."""
+        return [self.root / file.path for file in self.files]
+
+    @property
+    def source_paths(self) -> Optional[List[Path]]:
+        """Paths to the exploded source files ordered by OID, `None` if not written."""
+        if not self.options.explode_sources:
+            return None
+        return [self.root / cast(str, file.source_path) for file in self.files]
+
+
+def temporary_path(path: Path) -> Path:
+    """Unique temporary path to write a file to before moving it to `path`.
+
+    The path is in the same directory, so `os.replace` is atomic, and it is
+    hidden and has no `.parquet` suffix, so it is never taken for a data
+    file.
+    """
+    return path.with_name(f'.{path.name}.{uuid.uuid4().hex}.tmp')
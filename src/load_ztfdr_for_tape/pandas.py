@@ -1,16 +1,22 @@
 from pathlib import Path
-from typing import Iterable, Union
+from typing import Iterable, Optional, Union
 
 import pandas as pd
 import polars as pl
 
-from load_ztfdr_for_tape.columns import (ID_COLUMN, OBJECT_COLUMNS,
+from load_ztfdr_for_tape.columns import (DEC_COLUMN, HEALPIX_COLUMN, ID_COLUMN,
+                                         OBJECT_COLUMNS, RA_COLUMN,
                                          SOURCE_COLUMNS, TIME_DOMAIN_COLUMNS)
+from load_ztfdr_for_tape.healpix import radec_to_healpix
 
-__all__ = ["load_object_df", "load_source_df"]
+__all__ = ["load_object_df", "load_source_df", "load_exploded_source_df"]
 
 
-def load_object_df(path: Union[str, Path], columns: Iterable[str] = OBJECT_COLUMNS) -> pd.DataFrame:
+def load_object_df(
+        path: Union[str, Path],
+        columns: Iterable[str] = OBJECT_COLUMNS,
+        healpix_order: Optional[int] = None,
+) -> pd.DataFrame:
     """Load the "object" dataframe from a ZTF DR datafile.
 
     It loads all the columns but those that represent light curves.
@@ -22,13 +28,16 @@ def load_object_df(path: Union[str, Path], columns: Iterable[str] = OBJECT_COLUM
     columns : iterable of str
         Columns to load from the datafile. By default, it loads all the
         columns but those that represent light curves.
+    healpix_order : int or None
+        If given, add `HEALPIX_COLUMN` column with NESTED HEALPix pixel
+        numbers of this order, computed from object coordinates.
 
     Returns
     -------
     pd.DataFrame
         A pandas dataframe with the object table.
     """
-    polars_df = pl.read_parquet(path, columns=[ID_COLUMN] + list(columns))
+    polars_df = _read_parquet_with_healpix(path, [ID_COLUMN] + list(columns), healpix_order)
     pandas_df = polars_df.to_pandas(use_pyarrow_extension_array=True)
     pandas_df.set_index(ID_COLUMN, inplace=True)
     return pandas_df
@@ -37,7 +46,8 @@ def load_object_df(path: Union[str, Path], columns: Iterable[str] = OBJECT_COLUM
 def load_source_df(
         path: Union[str, Path],
         time_domain_columns: Iterable[str] = TIME_DOMAIN_COLUMNS,
-        source_columns: Iterable[str] = SOURCE_COLUMNS
+        source_columns: Iterable[str] = SOURCE_COLUMNS,
+        healpix_order: Optional[int] = None,
 ) -> pd.DataFrame:
     """Load the "source" dataframe from a ZTF DR datafile.
 
@@ -55,14 +65,61 @@ def load_source_df(
         Columns to load from the datafile. By default, it loads objectid,
         filterid and all the columns that represent light curves. It must
         be a superset of `time_domain_columns`.
+    healpix_order : int or None
+        If given, add `HEALPIX_COLUMN` column with NESTED HEALPix pixel
+        numbers of this order, computed from coordinates of the objects.
 
     Returns
     -------
     pd.DataFrame
         A pandas dataframe with the source table.
     """
-    polars_nested_df = pl.read_parquet(path, columns=[ID_COLUMN] + list(source_columns))
+    polars_nested_df = _read_parquet_with_healpix(path, [ID_COLUMN] + list(source_columns), healpix_order)
     polars_flat_df = polars_nested_df.explode(*time_domain_columns)
     pandas_df = polars_flat_df.to_pandas(use_pyarrow_extension_array=True)
     pandas_df.set_index(ID_COLUMN, inplace=True)
     return pandas_df
+
+
+def load_exploded_source_df(
+        path: Union[str, Path],
+        source_columns: Iterable[str] = SOURCE_COLUMNS,
+) -> pd.DataFrame:
+    """Load the "source" dataframe from a pre-exploded datafile.
+
+    Pre-exploded files are written by `load_ztfdr_for_tape.relayout`, they
+    already have a single row per detection.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the datafile to load.
+    source_columns : iterable of str
+        Columns to load from the datafile. By default, it loads objectid,
+        filterid and all the columns that represent light curves.
+
+    Returns
+    -------
+    pd.DataFrame
+        A pandas dataframe with the source table.
+    """
+    polars_df = pl.read_parquet(path, columns=[ID_COLUMN] + list(source_columns))
+    pandas_df = polars_df.to_pandas(use_pyarrow_extension_array=True)
+    pandas_df.set_index(ID_COLUMN, inplace=True)
+    return pandas_df
+
+
+def _read_parquet_with_healpix(
+        path: Union[str, Path],
+        columns: Iterable[str],
+        healpix_order: Optional[int],
+) -> pl.DataFrame:
+    """Read parquet file adding HEALPix column if `healpix_order` is given."""
+    columns = list(columns)
+    if healpix_order is None:
+        return pl.read_parquet(path, columns=columns)
+
+    coord_columns = [column for column in (RA_COLUMN, DEC_COLUMN) if column not in columns]
+    df = pl.read_parquet(path, columns=columns + coord_columns)
+    healpix = radec_to_healpix(healpix_order, df[RA_COLUMN].to_numpy(), df[DEC_COLUMN].to_numpy())
+    return df.with_columns(pl.Series(HEALPIX_COLUMN, healpix)).drop(coord_columns)
@@ -0,0 +1,193 @@
+"""Rewrite a ZTF DR tree into a layout optimized for loading.
+
+The upstream data files have row-group sizes, compression and statistics we
+don't control. `relayout` rewrites every file of a DR tree, sorted by
+object ID, with the given row-group size and codec, and full min/max
+statistics. Optionally, it also writes "exploded" source files, so the
+source table doesn't need to be flattened on every load.
+
+The output directory contains a manifest file, see
+`load_ztfdr_for_tape.layout`, which is used by
+`load_ztfdr_for_tape.filepath.get_ordered_paths` and the loaders to detect
+the optimized layout, and to resume an interrupted run.
+"""
+
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import polars as pl
+import pyarrow.parquet as pq
+
+from load_ztfdr_for_tape.columns import (ID_COLUMN, SOURCE_COLUMNS,
+                                         TIME_DOMAIN_COLUMNS, UNUSED_COLUMNS)
+from load_ztfdr_for_tape.filepath import get_ordered_paths
+from load_ztfdr_for_tape.layout import (EXPLODED_DIRNAME, MANIFEST_FILENAME,
+                                        NESTED_DIRNAME, LayoutFile,
+                                        OptimizedLayout, RelayoutOptions,
+                                        temporary_path)
+
+__all__ = ['MANIFEST_FILENAME', 'LayoutFile', 'OptimizedLayout', 'RelayoutOptions', 'relayout']
+
+
+def relayout(
+        input_path: Union[str, Path],
+        output_path: Union[str, Path],
+        *,
+        options: Optional[RelayoutOptions] = None,
+        max_workers: Optional[int] = None,
+) -> OptimizedLayout:
+    """Rewrite a ZTF DR tree into a layout optimized for loading.
+
+    Files keep their names and relative paths, they are written into the
+    "nested" subdirectory of `output_path`, and "exploded" source files
+    are written into the "exploded" subdirectory. Each file is written
+    atomically, so if the run is interrupted, re-running it with the same
+    options would skip already written files.
+
+    Parameters
+    ----------
+    input_path : str or Path
+        Root directory of the ZTF DR tree.
+    output_path : str or Path
+        Directory to write the optimized layout to, it must not be
+        `input_path` or inside it.
+    options : RelayoutOptions or None
+        Options of the output layout, default options are used if `None`.
+    max_workers : int or None
+        Number of files to process in parallel, see
+        `concurrent.futures.ThreadPoolExecutor` for the default value.
+
+    Returns
+    -------
+    OptimizedLayout
+        The written layout.
+    """
+    if options is None:
+        options = RelayoutOptions()
+    input_path = Path(input_path)
+    output_path = Path(output_path)
+    if output_path.resolve().is_relative_to(input_path.resolve()):
+        raise ValueError(
+            f'Output directory {output_path} must not be inside the input directory {input_path}'
+        )
+
+    ordered_paths = get_ordered_paths(input_path)
+
+    output_path.mkdir(parents=True, exist_ok=True)
+    existing = OptimizedLayout.from_dir(output_path, allow_incomplete=True)
+    if existing is not None and existing.options != options:
+        raise ValueError(
+            f'Layout in {output_path} was written with different options: {existing.options}, '
+            f'use the same options to resume or a different output directory'
+        )
+
+    layout = OptimizedLayout(root=output_path, options=options, files=[], complete=False)
+    layout.write_manifest()
+
+    def process(path):
+        return _relayout_file(Path(path).relative_to(input_path), input_path, output_path, options)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        layout.files = list(executor.map(process, ordered_paths))
+    finally:
+        # Don't start queued files after a failure or an interruption
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    layout.complete = True
+    layout.write_manifest()
+    return layout
+
+
+def _relayout_file(
+        relative_path: Path,
+        input_root: Path,
+        output_root: Path,
+        options: RelayoutOptions,
+) -> LayoutFile:
+    nested_relative = Path(NESTED_DIRNAME) / relative_path
+    nested_path = output_root / nested_relative
+    source_relative: Optional[Path] = None
+    source_path: Optional[Path] = None
+    if options.explode_sources:
+        source_relative = Path(EXPLODED_DIRNAME) / relative_path
+        source_path = output_root / source_relative
+
+    if not nested_path.exists() or (source_path is not None and not source_path.exists()):
+        df = pl.read_parquet(input_root / relative_path)
+        df = df.drop([column for column in UNUSED_COLUMNS if column in df.columns])
+        df = df.sort(ID_COLUMN)
+
+        if source_path is not None:
+            sources = df.select(ID_COLUMN, *SOURCE_COLUMNS).explode(*TIME_DOMAIN_COLUMNS)
+            _write_parquet(sources, source_path, options.source_row_group_size, options)
+        _write_parquet(df, nested_path, options.row_group_size, options)
+
+    metadata = pq.read_metadata(nested_path)
+    min_oid, max_oid = _oid_range(metadata)
+    return LayoutFile(
+        path=nested_relative.as_posix(),
+        num_rows=metadata.num_rows,
+        min_oid=min_oid,
+        max_oid=max_oid,
+        source_path=None if source_relative is None else source_relative.as_posix(),
+        num_sources=None if source_path is None else pq.read_metadata(source_path).num_rows,
+    )
+
+
+def _write_parquet(df: pl.DataFrame, path: Path, row_group_size: int, options: RelayoutOptions) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = temporary_path(path)
+    df.write_parquet(
+        tmp_path,
+        compression=options.compression,  # type: ignore
+        compression_level=options.compression_level,
+        statistics=True,
+        row_group_size=row_group_size,
+        use_pyarrow=True,
+    )
+    os.replace(tmp_path, path)
+
+
+def _oid_range(metadata: pq.FileMetaData) -> Sequence[Optional[int]]:
+    if metadata.num_rows == 0:
+        return None, None
+    column_index = metadata.schema.to_arrow_schema().get_field_index(ID_COLUMN)
+    # Files are sorted by OID, so the first and the last row groups have the extremes
+    first = metadata.row_group(0).column(column_index).statistics
+    last = metadata.row_group(metadata.num_row_groups - 1).column(column_index).statistics
+    return first.min, last.max
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line interface for `relayout`."""
+    defaults = RelayoutOptions()
+    parser = argparse.ArgumentParser(description='Rewrite a ZTF DR tree into a layout optimized for loading')
+    parser.add_argument('input', help='root directory of the ZTF DR tree')
+    parser.add_argument('output', help='output directory')
+    parser.add_argument('--row-group-size', type=int, default=defaults.row_group_size,
+                        help='number of objects per row group of the nested files')
+    parser.add_argument('--source-row-group-size', type=int, default=defaults.source_row_group_size,
+                        help='number of detections per row group of the exploded source files')
+    parser.add_argument('--compression', default=defaults.compression, help='parquet compression codec')
+    parser.add_argument('--compression-level', type=int, default=defaults.compression_level,
+                        help='compression level')
+    parser.add_argument('--explode-sources', action='store_true', help='write pre-exploded source files')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of files to process in parallel')
+    args = parser.parse_args(argv)
+
+    options = RelayoutOptions(
+        row_group_size=args.row_group_size,
+        source_row_group_size=args.source_row_group_size,
+        compression=args.compression,
+        compression_level=args.compression_level,
+        explode_sources=args.explode_sources,
+    )
+    relayout(args.input, args.output, options=options, max_workers=args.jobs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+"""Long-running local server for object and light curve lookups by OID.
+
+Interactive tools issue many small lookups, and each of them would pay for
+the interpreter startup, package import, directory globbing and parquet
+footer parsing. `LightCurveStore` does all this once: it indexes the DR
+files by their names, keeps parsed footers and recently used decoded row
+groups in bounded LRU caches, and coalesces concurrent requests decoding
+the same row group. `serve` exposes it over HTTP on a local address:
+
+- ``GET /object/<oid>`` returns a JSON object with all the columns of the
+  object, including the light curve, or 404 if there is no such object;
+- ``GET /objects?oid=<oid>&oid=<oid>...`` returns a JSON list, with
+  ``null`` for OIDs which were not found;
+- ``GET /stats`` returns cache statistics.
+
+Lookups are much faster for files sorted by OID with small row groups,
+see `load_ztfdr_for_tape.relayout`.
+"""
+
+import argparse
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import (Any, Dict, Hashable, Iterable, List, Optional, Sequence,
+                    Tuple, Union)
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from load_ztfdr_for_tape.columns import ID_COLUMN, UNUSED_COLUMNS
+from load_ztfdr_for_tape.filepath import ParsedDataFilePath, get_ordered_paths
+from load_ztfdr_for_tape.oid import OIDParts
+
+__all__ = ['CacheStats', 'LightCurveStore', 'make_server', 'serve']
+
+
+PathType = Union[str, Path]
+FileKey = Tuple[int, str, int, int]
+
+
+@dataclass
+class CacheStats:
+    """Counters of `LightCurveStore` caches."""
+
+    footer_hits: int = 0
+    footer_misses: int = 0
+    row_group_hits: int = 0
+    row_group_misses: int = 0
+    row_group_coalesced: int = 0
+    """Number of row group requests served by another request's in-flight decoding."""
+    row_group_cache_bytes: int = 0
+
+
+@dataclass
+class _Footer:
+    """Parsed parquet footer with OID ranges of the row groups."""
+
+    metadata: pq.FileMetaData
+    min_oids: np.ndarray
+    max_oids: np.ndarray
+
+    @classmethod
+    def read(cls, file_path: PathType) -> '_Footer':
+        """Read and parse the footer of a parquet file."""
+        metadata = pq.read_metadata(file_path)
+        column_index = metadata.schema.to_arrow_schema().get_field_index(ID_COLUMN)
+        # Row groups without statistics may contain any OID
+        min_oids = np.full(metadata.num_row_groups, np.iinfo(np.int64).min)
+        max_oids = np.full(metadata.num_row_groups, np.iinfo(np.int64).max)
+        for row_group in range(metadata.num_row_groups):
+            statistics = metadata.row_group(row_group).column(column_index).statistics
+            if statistics is not None and statistics.has_min_max:
+                min_oids[row_group] = statistics.min
+                max_oids[row_group] = statistics.max
+        return cls(metadata, min_oids, max_oids)
+
+    def candidate_row_groups(self, oid: int) -> np.ndarray:
+        """Row groups which may contain the OID according to the statistics."""
+        return np.nonzero((self.min_oids <= oid) & (oid <= self.max_oids))[0]
+
+
+class _LRUCache:
+    """Thread-unsafe LRU cache bounded by the total size of its values."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self._data: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value and mark it as recently used, `None` if missing."""
+        try:
+            value, _size = self._data[key]
+        except KeyError:
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any, size: int = 1) -> None:
+        """Put a value, evicting the least recently used values if needed."""
+        if size > self.max_size:
+            return
+        if key in self._data:
+            self.size -= self._data.pop(key)[1]
+        self._data[key] = (value, size)
+        self.size += size
+        while self.size > self.max_size:
+            _key, (_value, evicted_size) = self._data.popitem(last=False)
+            self.size -= evicted_size
+
+
+class LightCurveStore:
+    """Object and light curve lookups by OID with in-memory caches.
+
+    It is thread-safe, all the methods may be called concurrently.
+
+    Parameters
+    ----------
+    path : single path or iterable of paths
+        Path to the data files. If a single path is given, it should be a
+        directory of `.parquet` files or an optimized layout written by
+        `load_ztfdr_for_tape.relayout`. If an iterator is given, it should
+        yield paths to `.parquet` files.
+    max_footers : int
+        Maximum number of parsed parquet footers to keep.
+    max_row_group_bytes : int
+        Maximum total size of decoded row groups to keep, in bytes.
+    """
+
+    def __init__(
+            self,
+            path: Union[Iterable[PathType], PathType],
+            *,
+            max_footers: int = 4096,
+            max_row_group_bytes: int = 1 << 30,
+    ):
+        self.files: Dict[FileKey, PathType] = {}
+        for file_path in get_ordered_paths(path):
+            parsed = ParsedDataFilePath.from_path(file_path)
+            self.files[(parsed.field, parsed.band, parsed.ccdid, parsed.qid)] = file_path
+
+        self._lock = threading.Lock()
+        self._footers = _LRUCache(max_footers)
+        self._row_groups = _LRUCache(max_row_group_bytes)
+        self._in_flight: Dict[Tuple[PathType, int], Future] = {}
+        self._stats = CacheStats()
+
+    @property
+    def stats(self) -> CacheStats:
+        """Snapshot of the cache statistics."""
+        with self._lock:
+            return CacheStats(**{**asdict(self._stats), 'row_group_cache_bytes': self._row_groups.size})
+
+    def get(self, oid: int) -> Optional[Dict[str, Any]]:
+        """Get the object with its light curve, `None` if not found."""
+        return self.get_many([oid])[0]
+
+    def get_many(self, oids: Sequence[int]) -> List[Optional[Dict[str, Any]]]:
+        """Get objects with their light curves, `None` for those not found.
+
+        OIDs are grouped by file and by row group, so each row group is
+        decoded at most once per call.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(oids)
+
+        by_file: Dict[PathType, List[int]] = {}
+        for i, oid in enumerate(oids):
+            file_path = self.file_path(oid)
+            if file_path is not None:
+                by_file.setdefault(file_path, []).append(i)
+
+        for file_path, indexes in by_file.items():
+            footer = self._footer(file_path)
+            by_row_group: Dict[int, List[int]] = {}
+            for i in indexes:
+                for row_group in footer.candidate_row_groups(oids[i]):
+                    by_row_group.setdefault(int(row_group), []).append(i)
+
+            for row_group, row_group_indexes in by_row_group.items():
+                table = self._row_group(file_path, footer, row_group)
+                requested = pa.array([oids[i] for i in row_group_indexes], type=table[ID_COLUMN].type)
+                # pyarrow.compute functions are generated at runtime
+                is_requested = pc.is_in(table[ID_COLUMN], value_set=requested)  # pylint: disable=no-member
+                matches = table.filter(is_requested)
+                records = {record[ID_COLUMN]: record for record in matches.to_pylist()}
+                for i in row_group_indexes:
+                    if oids[i] in records:
+                        results[i] = records[oids[i]]
+
+        return results
+
+    def file_path(self, oid: int) -> Optional[PathType]:
+        """Path to the file which would contain the OID, `None` if not indexed."""
+        parts = OIDParts.from_oid(oid)
+        try:
+            return self.files.get((parts.field, parts.band_name, parts.ccdid, parts.qid))
+        except KeyError:
+            # Invalid band number
+            return None
+
+    def _footer(self, file_path: PathType) -> _Footer:
+        with self._lock:
+            footer = self._footers.get(file_path)
+            if footer is not None:
+                self._stats.footer_hits += 1
+                return footer
+            self._stats.footer_misses += 1
+        # Parsing footers of different files concurrently is fine,
+        # we may parse the same footer twice, but never block on it
+        footer = _Footer.read(file_path)
+        with self._lock:
+            self._footers.put(file_path, footer)
+        return footer
+
+    def _row_group(self, file_path: PathType, footer: _Footer, row_group: int) -> pa.Table:
+        key = (file_path, row_group)
+        with self._lock:
+            table = self._row_groups.get(key)
+            if table is not None:
+                self._stats.row_group_hits += 1
+                return table
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats.row_group_coalesced += 1
+                owner = False
+            else:
+                self._stats.row_group_misses += 1
+                future = self._in_flight[key] = Future()
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            parquet_file = pq.ParquetFile(file_path, metadata=footer.metadata)
+            table = parquet_file.read_row_group(row_group)
+            table = table.drop([column for column in UNUSED_COLUMNS if column in table.column_names])
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._row_groups.put(key, table, table.nbytes)
+            del self._in_flight[key]
+        future.set_result(table)
+        return table
+
+
+class _JSONEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, np.generic):
+            return o.item()
+        return super().default(o)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    store: LightCurveStore
+
+    # Allows keep-alive connections, we always send Content-Length
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Handle GET requests."""
+        url = urlsplit(self.path)
+        try:
+            if url.path.startswith('/object/'):
+                record = self.store.get(int(url.path.removeprefix('/object/')))
+                if record is None:
+                    self._send_json({'error': 'object not found'}, HTTPStatus.NOT_FOUND)
+                else:
+                    self._send_json(record)
+            elif url.path == '/objects':
+                oids = [int(oid) for oid in parse_qs(url.query).get('oid', [])]
+                self._send_json(self.store.get_many(oids))
+            elif url.path == '/stats':
+                self._send_json(asdict(self.store.stats))
+            else:
+                self._send_json({'error': 'unknown endpoint'}, HTTPStatus.NOT_FOUND)
+        except ValueError as e:
+            self._send_json({'error': str(e)}, HTTPStatus.BAD_REQUEST)
+        except OSError as e:
+            # E.g. a data file was removed after the store was created
+            self._send_json({'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def _send_json(self, data: Any, status: HTTPStatus = HTTPStatus.OK) -> None:
+        body = json.dumps(data, cls=_JSONEncoder).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        # Do not log every request to stderr
+        pass
+
+
+def make_server(store: LightCurveStore, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Create an HTTP server for the store, call `serve_forever` to run it.
+
+    Use `port=0` to get a random free port, see `server.server_address`.
+    """
+    handler = type('RequestHandler', (_RequestHandler,), {'store': store})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(
+        path: Union[Iterable[PathType], PathType],
+        host: str = '127.0.0.1',
+        port: int = 8000,
+        *,
+        max_footers: int = 4096,
+        max_row_group_bytes: int = 1 << 30,
+) -> None:
+    """Serve objects and light curves over HTTP until interrupted.
+
+    See `LightCurveStore` for the parameters description.
+    """
+    store = LightCurveStore(path, max_footers=max_footers, max_row_group_bytes=max_row_group_bytes)
+    with make_server(store, host, port) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line interface for `serve`."""
+    parser = argparse.ArgumentParser(description='Serve ZTF DR objects and light curves over local HTTP')
+    parser.add_argument('path', help='root directory of the ZTF DR tree or of an optimized layout')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on')
+    parser.add_argument('--max-footers', type=int, default=4096, help='number of parquet footers to cache')
+    parser.add_argument('--cache-mb', type=int, default=1024, help='size of the decoded row group cache, MiB')
+    args = parser.parse_args(argv)
+
+    serve(
+        args.path,
+        args.host,
+        args.port,
+        max_footers=args.max_footers,
+        max_row_group_bytes=args.cache_mb << 20,
+    )
+
+
+if __name__ == '__main__':
+    main()
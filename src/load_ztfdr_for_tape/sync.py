@@ -0,0 +1,156 @@
+"""Partition-local synchronization of "object" and "source" frames.
+
+Frames from `load_object_source_frames_from_path` share divisions by
+construction: the n-th partitions of both frames are loaded from the same
+data file, so all the sources of an object are in the same partition as
+the object. That's why synchronizing the frames, for example dropping
+sources of objects filtered out, doesn't need a global join or shuffle and
+can be done partition by partition.
+"""
+
+from typing import Optional, Tuple
+
+import dask.dataframe as dd
+import pandas as pd
+
+from load_ztfdr_for_tape.columns import ID_COLUMN, NEPOCHS_COLUMN
+
+__all__ = ['check_object_index', 'check_shared_divisions', 'sync_object_source_frames']
+
+
+def sync_object_source_frames(
+        objects: dd.DataFrame,
+        sources: dd.DataFrame,
+        *,
+        drop_empty_objects: bool = False,
+        recompute_nepochs: bool = True,
+        validate: bool = False,
+) -> Tuple[dd.DataFrame, dd.DataFrame]:
+    """Synchronize "object" and "source" frames partition by partition.
+
+    Sources of objects which are not in `objects` are dropped, and
+    `nepochs` column of `objects` is recomputed from the remaining sources.
+    Filter any of the frames first, and then call this function to
+    propagate the filter to the other frame.
+
+    Parameters
+    ----------
+    objects : dd.DataFrame
+        "Object" frame indexed by object ID, it could be filtered.
+    sources : dd.DataFrame
+        "Source" frame indexed by object ID, it could be filtered. It must
+        have the same divisions as `objects`. Frames indexed by anything
+        else, for example by HEALPix pixel, are not supported.
+    drop_empty_objects : bool
+        Whether to drop objects which have no sources.
+    recompute_nepochs : bool
+        Whether to recompute `nepochs` column of `objects` as the number of
+        sources, if there is such a column.
+    validate : bool
+        Whether to check that the index values of each partition are within
+        its divisions, when the frames are computed. It is useful for frames
+        which divisions are not guaranteed by construction.
+
+    Returns
+    -------
+    dd.DataFrame
+        Synchronized "object" frame.
+    dd.DataFrame
+        Synchronized "source" frame.
+    """
+    check_object_index(objects, sources)
+    check_shared_divisions(objects, sources)
+
+    synced_sources = dd.map_partitions(
+        _sync_sources_partition,
+        sources,
+        objects,
+        check_divisions=sources.divisions if validate else None,
+        meta=sources,
+        align_dataframes=False,
+        enforce_metadata=False,
+    )
+
+    recompute_nepochs = recompute_nepochs and NEPOCHS_COLUMN in objects.columns
+    if not (drop_empty_objects or recompute_nepochs):
+        return objects, synced_sources
+
+    synced_objects = dd.map_partitions(
+        _sync_objects_partition,
+        objects,
+        synced_sources,
+        drop_empty_objects=drop_empty_objects,
+        recompute_nepochs=recompute_nepochs,
+        meta=objects,
+        align_dataframes=False,
+        enforce_metadata=False,
+    )
+    return synced_objects, synced_sources
+
+
+def check_object_index(objects: dd.DataFrame, sources: dd.DataFrame) -> None:
+    """Check that both frames are indexed by object ID.
+
+    Raises `ValueError` if they aren't: equal divisions of other indexes,
+    such as HEALPix pixel numbers, don't mean that the sources of an object
+    are in the same partition as the object.
+    """
+    for name, frame in (('objects', objects), ('sources', sources)):
+        if frame.index.name != ID_COLUMN:
+            raise ValueError(
+                f'{name} frame must be indexed by {ID_COLUMN}, got index {frame.index.name!r}, '
+                f'use a global join to synchronize them'
+            )
+
+
+def check_shared_divisions(objects: dd.DataFrame, sources: dd.DataFrame) -> None:
+    """Check that the frames have the same known divisions.
+
+    Raises `ValueError` if they don't, so they cannot be synchronized
+    partition by partition.
+    """
+    if not objects.known_divisions or not sources.known_divisions:
+        raise ValueError('Both frames must have known divisions, use a global join to synchronize them')
+    if objects.divisions != sources.divisions:
+        raise ValueError('Frames must have the same divisions, use a global join to synchronize them')
+
+
+def _sync_sources_partition(
+        sources: pd.DataFrame,
+        objects: pd.DataFrame,
+        check_divisions: Optional[Tuple] = None,
+        partition_info: Optional[dict] = None,
+) -> pd.DataFrame:
+    if check_divisions is not None and partition_info is not None:
+        _check_partition_index(objects, check_divisions, partition_info['number'], 'objects')
+        _check_partition_index(sources, check_divisions, partition_info['number'], 'sources')
+    return sources[sources.index.isin(objects.index)]
+
+
+def _sync_objects_partition(
+        objects: pd.DataFrame,
+        sources: pd.DataFrame,
+        *,
+        drop_empty_objects: bool,
+        recompute_nepochs: bool,
+) -> pd.DataFrame:
+    counts = sources.index.value_counts()
+    if drop_empty_objects:
+        objects = objects[objects.index.isin(counts.index)]
+    if recompute_nepochs:
+        nepochs = counts.reindex(objects.index, fill_value=0).astype(objects.dtypes[NEPOCHS_COLUMN])
+        objects = objects.assign(**{NEPOCHS_COLUMN: nepochs})
+    return objects
+
+
+def _check_partition_index(df: pd.DataFrame, divisions: Tuple, number: int, name: str) -> None:
+    if df.empty:
+        return
+    lower, upper = divisions[number], divisions[number + 1]
+    is_last = number == len(divisions) - 2
+    index_min, index_max = df.index.min(), df.index.max()
+    if index_min < lower or index_max > upper or (not is_last and index_max == upper):
+        raise ValueError(
+            f'Partition {number} of {name} has index values in [{index_min}, {index_max}], '
+            f'outside of its divisions [{lower}, {upper}{"]" if is_last else ")"}'
+        )
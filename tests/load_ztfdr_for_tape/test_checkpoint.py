@@ -0,0 +1,113 @@
+import threading
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_series_equal
+
+from load_ztfdr_for_tape import checkpoint, columns
+from load_ztfdr_for_tape.checkpoint import result_path, run_checkpointed
+from load_ztfdr_for_tape.filepath import get_ordered_paths
+from load_ztfdr_for_tape.pandas import load_object_df, load_source_df
+
+
+class MeanMag:  # pylint: disable=too-few-public-methods
+    """Computes mean magnitudes and counts calls."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, objects, sources):
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            mean_mag = sources['mag'].groupby(level=0).mean().astype(float)
+            return pd.DataFrame({'mean_mag': mean_mag, 'nepochs': objects['nepochs'].astype(int)})
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def test_run_checkpointed(lc_dr19, tmp_path):
+    func = MeanMag()
+    ordered_paths = get_ordered_paths(lc_dr19)
+
+    results = run_checkpointed(func, lc_dr19, tmp_path, max_concurrency=2, scheduler='sync')
+
+    assert results == [result_path(tmp_path, path) for path in ordered_paths]
+    assert func.calls == len(ordered_paths)
+    assert func.max_running <= 2
+    for data_path, result in zip(ordered_paths, results):
+        df = pd.read_parquet(result)
+        sources = load_source_df(data_path)
+        expected = sources['mag'].groupby(level=0).mean().astype(float)
+        assert_series_equal(df['mean_mag'], expected, check_names=False, check_index_type=False)
+        assert len(df) == len(load_object_df(data_path))
+    assert sorted(tmp_path.iterdir()) == sorted(results)
+
+
+def test_run_checkpointed_resume(lc_dr19, tmp_path):
+    results = run_checkpointed(MeanMag(), lc_dr19, tmp_path, scheduler='sync')
+    mtimes = [path.stat().st_mtime_ns for path in results]
+
+    # Emulate an interrupted run
+    results[1].unlink()
+
+    func = MeanMag()
+    assert run_checkpointed(func, lc_dr19, tmp_path, scheduler='sync') == results
+    assert func.calls == 1
+    assert results[1].exists()
+    assert [results[0].stat().st_mtime_ns, results[2].stat().st_mtime_ns] == [mtimes[0], mtimes[2]]
+
+
+def test_run_checkpointed_failure(lc_dr19, tmp_path):
+    ordered_paths = get_ordered_paths(lc_dr19)
+    failing_oid = load_object_df(ordered_paths[0]).index[0]
+
+    def failing(objects, sources):
+        if failing_oid in objects.index:
+            raise RuntimeError('Partition failed')
+        return MeanMag()(objects, sources)
+
+    with pytest.raises(RuntimeError):
+        run_checkpointed(failing, lc_dr19, tmp_path, max_concurrency=1, scheduler='sync')
+    assert not result_path(tmp_path, ordered_paths[0]).exists()
+    # No temporary files left
+    assert all(path.suffix == '.parquet' for path in tmp_path.iterdir())
+
+    n_missing = len(ordered_paths) - len(list(tmp_path.iterdir()))
+    func = MeanMag()
+    run_checkpointed(func, lc_dr19, tmp_path, scheduler='sync')
+    assert func.calls == n_missing
+    assert all(result_path(tmp_path, path).exists() for path in ordered_paths)
+
+
+def test_run_checkpointed_interrupted(lc_dr19, tmp_path, monkeypatch):
+    released = threading.Event()
+
+    def interrupted_wait(*_args, **_kwargs):
+        # Let the running partition finish after the interruption
+        threading.Timer(0.1, released.set).start()
+        raise KeyboardInterrupt
+
+    def blocking(objects, sources):
+        released.wait()
+        return MeanMag()(objects, sources)
+
+    monkeypatch.setattr(checkpoint, 'wait', interrupted_wait)
+    with pytest.raises(KeyboardInterrupt):
+        run_checkpointed(blocking, lc_dr19, tmp_path, max_concurrency=1, scheduler='sync')
+    # Queued partitions are not started
+    assert len(list(tmp_path.iterdir())) <= 1
+
+
+def test_objects_and_sources_match(lc_dr19, tmp_path):
+    def check(objects, sources):
+        assert set(sources.index) <= set(objects.index)
+        return pd.DataFrame({columns.ID_COLUMN: objects.index.to_numpy()})
+
+    run_checkpointed(check, lc_dr19, tmp_path, scheduler='sync')
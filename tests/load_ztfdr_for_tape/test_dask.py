@@ -1,16 +1,26 @@
+import os
+import pickle
 from pathlib import Path
 from typing import cast
 
+import dask
 import numpy as np
+import pandas as pd
 import polars as pl
 import pyarrow.parquet as pq
+import pytest
 from numpy.testing import assert_array_equal
+from pandas.testing import assert_frame_equal
 
 from load_ztfdr_for_tape import columns
-from load_ztfdr_for_tape.dask import (derive_dd_divisions, load_object_frame,
+from load_ztfdr_for_tape.dask import (derive_dd_divisions,
+                                      derive_healpix_divisions,
+                                      load_frame_from_path, load_object_frame,
+                                      load_object_source_frames_by_healpix,
                                       load_object_source_frames_from_path,
                                       load_source_frame)
 from load_ztfdr_for_tape.filepath import get_ordered_paths
+from load_ztfdr_for_tape.pandas import load_object_df
 
 
 def count_rows(path: Path) -> int:
@@ -90,3 +100,77 @@ def test_load_object_source_frames_from_path(lc_dr19):
 
     # Check index matches
     assert_array_equal(np.unique(objects_computed.index), np.unique(sources_computed.index))
+
+
+def test_load_object_frame_healpix(lc_dr19):
+    df = load_object_frame(lc_dr19, healpix_order=8)
+    computed = df.compute()
+    assert set(computed.columns) == set(columns.OBJECT_COLUMNS) | {columns.HEALPIX_COLUMN}
+    assert computed[columns.HEALPIX_COLUMN].between(0, 12 * 4 ** 8 - 1).all()
+
+
+def test_derive_healpix_divisions():
+    divisions = derive_healpix_divisions(5, 2)
+    assert len(divisions) == 12 * 4 ** 2 + 1
+    assert divisions[0] == 0
+    assert divisions[-1] == 12 * 4 ** 5
+    assert np.all(np.diff(divisions) == 4 ** 3)
+
+
+def test_load_object_source_frames_by_healpix(lc_dr19):
+    order, partition_order = 10, 2
+    objects, sources = load_object_source_frames_by_healpix(
+        lc_dr19, order=order, partition_order=partition_order
+    )
+
+    assert objects.divisions == sources.divisions == derive_healpix_divisions(order, partition_order)
+
+    objects_computed = objects.compute()
+    sources_computed = sources.compute()
+    assert objects_computed.index.name == sources_computed.index.name == columns.HEALPIX_COLUMN
+    assert objects_computed.index.is_monotonic_increasing
+    assert objects_computed.shape[0] == count_rows(lc_dr19)
+    assert sources_computed.shape[0] == count_items(lc_dr19, columns.TIME_DOMAIN_COLUMNS[0])
+
+    # Each object and its sources must be in the same partition
+    object_partitions, source_partitions = dask.compute(objects.to_delayed(), sources.to_delayed())
+    for object_partition, source_partition in zip(object_partitions, source_partitions):
+        assert_array_equal(
+            np.unique(object_partition[columns.ID_COLUMN]),
+            np.unique(source_partition[columns.ID_COLUMN]),
+        )
+
+
+def test_load_frame_from_path_enforce_metadata(lc_dr19):
+    ordered_paths = get_ordered_paths(lc_dr19)
+    df = load_frame_from_path(
+        load_object_df,
+        ordered_paths=ordered_paths,
+        divisions=derive_dd_divisions(ordered_paths),
+        meta=pd.DataFrame({'a': []}),
+    )
+    with pytest.raises(ValueError):
+        df.compute()
+
+
+def test_load_frame_from_path_graph(lc_dr19):
+    ordered_paths = get_ordered_paths(lc_dr19)
+    df = load_frame_from_path(
+        load_object_df,
+        ordered_paths=ordered_paths,
+        divisions=derive_dd_divisions(ordered_paths),
+        meta=None,
+        enforce_metadata=False,
+    )
+
+    # Tasks have neither other paths nor meta embedded
+    serialized_tasks = [pickle.dumps(task) for task in dict(df.__dask_graph__()).values()]
+    serialized_paths = [os.fspath(path).encode() for path in ordered_paths]
+    for serialized in serialized_tasks:
+        assert sum(path in serialized for path in serialized_paths) <= 1
+        assert b'DataFrame' not in serialized
+        assert not any(column.encode() in serialized for column in columns.OBJECT_COLUMNS)
+    for path in serialized_paths:
+        assert sum(path in serialized for serialized in serialized_tasks) == 1
+
+    assert_frame_equal(df.get_partition(1).compute(), load_object_df(ordered_paths[1]))
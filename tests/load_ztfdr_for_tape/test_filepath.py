@@ -41,7 +41,7 @@ def test_order_paths_by_oid():
 
 
 def test_get_ordered_paths(lc_dr19):
-    ordered = get_ordered_paths(lc_dr19)
+    ordered = get_ordered_paths(directory=lc_dr19)
 
     assert ordered == [
         lc_dr19 / '0' / 'field000202' / 'ztf_000202_zg_c12_q1_dr19.parquet',
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from load_ztfdr_for_tape.healpix import (MAX_HEALPIX_ORDER, healpix_npix,
+                                         radec_to_healpix)
+
+
+@pytest.mark.parametrize(
+    'order,ra,dec,expected',
+    [
+        # Values are computed with healpy.ang2pix(2**order, ra, dec, lonlat=True, nest=True)
+        (0, 0.0, 0.0, 4),
+        (0, 0.0, 90.0, 0),
+        (0, 180.0, -90.0, 10),
+        (5, 123.4, -23.5, 10124),
+        (10, 10.68, 41.27, 693522),
+        (19, 290.0, 55.5, 1020581543326),
+    ]
+)
+def test_radec_to_healpix_known_values(order, ra, dec, expected):
+    assert radec_to_healpix(order, ra, dec) == expected
+
+
+@pytest.mark.parametrize('order', [0, 3, 12, MAX_HEALPIX_ORDER])
+def test_radec_to_healpix_range(order):
+    rng = np.random.default_rng(0)
+    ra = rng.uniform(0.0, 360.0, 10_000)
+    dec = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, 10_000)))
+
+    pixels = radec_to_healpix(order, ra, dec)
+
+    assert pixels.dtype == np.int64
+    assert np.all(pixels >= 0)
+    assert np.all(pixels < healpix_npix(order))
+
+
+def test_radec_to_healpix_nested():
+    """Parent pixel of a NESTED pixel is the pixel number divided by 4."""
+    rng = np.random.default_rng(0)
+    ra = rng.uniform(0.0, 360.0, 10_000)
+    dec = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, 10_000)))
+
+    assert_array_equal(radec_to_healpix(10, ra, dec) // 4 ** 3, radec_to_healpix(7, ra, dec))
+
+
+def test_invalid_order():
+    with pytest.raises(ValueError):
+        radec_to_healpix(MAX_HEALPIX_ORDER + 1, 0.0, 0.0)
+    with pytest.raises(ValueError):
+        healpix_npix(-1)
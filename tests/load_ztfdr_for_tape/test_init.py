@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+import pytest
+
+import load_ztfdr_for_tape
+from load_ztfdr_for_tape import dask
+
+HEAVY_MODULES = ('dask', 'numpy', 'pandas', 'polars', 'pyarrow')
+
+
+def test_all():
+    assert set(load_ztfdr_for_tape.__all__) == set(dask.__all__)
+    for name in load_ztfdr_for_tape.__all__:
+        assert getattr(load_ztfdr_for_tape, name) is getattr(dask, name)
+        assert name in dir(load_ztfdr_for_tape)
+
+
+@pytest.mark.parametrize('submodule', ['columns', 'dask', 'filepath', 'oid', 'pandas'])
+def test_submodule_attribute(submodule):
+    # Run in a subprocess, because other tests may have imported the submodule already
+    code = f'import load_ztfdr_for_tape; print(load_ztfdr_for_tape.{submodule}.__name__)'
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    assert output.strip() == f'load_ztfdr_for_tape.{submodule}'
+    assert submodule in dir(load_ztfdr_for_tape)
+
+
+def test_missing_attribute():
+    with pytest.raises(AttributeError):
+        _ = load_ztfdr_for_tape.no_such_attribute
+
+
+@pytest.mark.parametrize(
+    'statement',
+    [
+        'import load_ztfdr_for_tape',
+        'from load_ztfdr_for_tape.oid import OIDParts',
+        'from load_ztfdr_for_tape.filepath import ParsedDataFilePath, order_paths_by_oid',
+        'from load_ztfdr_for_tape import bands, columns, filepath, oid',
+        'import load_ztfdr_for_tape; load_ztfdr_for_tape.filepath.get_ordered_paths',
+    ]
+)
+def test_no_heavy_imports(statement):
+    code = f'{statement}; import sys; print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    assert output.strip() == '', f'"{statement}" imports {output.strip()}'
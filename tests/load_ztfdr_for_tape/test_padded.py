@@ -0,0 +1,98 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+from numpy.testing import assert_array_equal
+
+from load_ztfdr_for_tape import columns
+from load_ztfdr_for_tape.padded import (iter_padded_batches, load_padded,
+                                        pad_list_array)
+from load_ztfdr_for_tape.pandas import load_object_df, load_source_df
+
+
+def test_pad_list_array():
+    array = pa.array([[1, 2, 3], [], None, [4, 5]])
+
+    padded, lengths = pad_list_array(array, fill_value=-1)
+    assert_array_equal(padded, [[1, 2, 3], [-1, -1, -1], [-1, -1, -1], [4, 5, -1]])
+    assert_array_equal(lengths, [3, 0, 0, 2])
+
+
+def test_pad_list_array_truncate():
+    array = pa.chunked_array([pa.array([[1, 2, 3]]), pa.array([[4, 5]]).slice(0)])
+
+    padded, lengths = pad_list_array(array, width=2)
+    assert_array_equal(padded, [[1, 2], [4, 5]])
+    assert_array_equal(lengths, [2, 2])
+
+    padded, lengths = pad_list_array(array, width=2, keep='last')
+    assert_array_equal(padded, [[2, 3], [4, 5]])
+
+
+def test_pad_list_array_sliced():
+    array = pa.array([[1, 2, 3], [4], [5, 6]]).slice(1)
+
+    padded, lengths = pad_list_array(array)
+    assert_array_equal(padded, [[4, 0], [5, 6]])
+    assert_array_equal(lengths, [1, 2])
+
+
+def test_load_padded(lc_dr19_single_file):
+    batch = load_padded(lc_dr19_single_file)
+    objects = load_object_df(lc_dr19_single_file)
+    sources = load_source_df(lc_dr19_single_file)
+
+    assert_array_equal(batch.objectid, objects.index)
+    assert_array_equal(batch.lengths, objects['nepochs'])
+    assert batch.width == objects['nepochs'].max()
+    assert batch.mask.sum() == len(sources)
+    for column in columns.TIME_DOMAIN_COLUMNS:
+        assert batch.columns[column].shape == (len(batch), batch.width)
+        assert_array_equal(batch.columns[column][batch.mask], sources[column].to_numpy())
+
+    stacked = batch.stack()
+    assert stacked.shape == (len(batch), batch.width, len(columns.TIME_DOMAIN_COLUMNS))
+    # No precision loss of hmjd by default
+    hmjd_index = list(batch.columns).index('hmjd')
+    assert_array_equal(stacked[..., hmjd_index][batch.mask], sources['hmjd'].to_numpy())
+
+
+def test_load_padded_max_length(lc_dr19_single_file):
+    batch = load_padded(lc_dr19_single_file, ['hmjd'], max_length=10, keep='last')
+    full = load_padded(lc_dr19_single_file, ['hmjd'])
+
+    assert batch.width == 10
+    assert np.all(batch.lengths <= 10)
+    for i in np.nonzero(full.lengths >= 10)[0][:10]:
+        last = full.columns['hmjd'][i, full.lengths[i] - 10:full.lengths[i]]
+        assert_array_equal(batch.columns['hmjd'][i], last)
+
+
+@pytest.mark.parametrize('bucket_boundaries', [None, [50, 200]])
+def test_iter_padded_batches(lc_dr19, bucket_boundaries):
+    batch_size = 1000
+    batches = list(iter_padded_batches(lc_dr19, batch_size, bucket_boundaries=bucket_boundaries))
+
+    objectid = np.concatenate([batch.objectid for batch in batches])
+    assert len(objectid) == len(np.unique(objectid)) == sum(1 for _ in _all_objects(lc_dr19))
+    assert sum(len(batch) < batch_size for batch in batches) <= len(bucket_boundaries or []) + 1
+
+    for batch in batches:
+        assert batch.width == batch.lengths.max()
+        if bucket_boundaries is not None:
+            buckets = np.searchsorted(bucket_boundaries, batch.lengths, side='right')
+            assert np.all(buckets == buckets[0])
+
+
+def test_iter_padded_batches_fixed_length(lc_dr19):
+    batches = list(iter_padded_batches(lc_dr19, 512, max_length=100, fixed_length=True, drop_last=True))
+    assert len(batches) > 0
+    for batch in batches:
+        assert len(batch) == 512
+        assert batch.width == 100
+        assert batch.mask.shape == (512, 100)
+        assert_array_equal(batch.mask.sum(axis=1), batch.lengths)
+
+
+def _all_objects(path):
+    for file_path in path.glob('**/*.parquet'):
+        yield from load_object_df(file_path).index
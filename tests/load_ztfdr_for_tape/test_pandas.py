@@ -1,6 +1,7 @@
 from pandas.api.types import is_numeric_dtype
 
 from load_ztfdr_for_tape import columns, pandas
+from load_ztfdr_for_tape.healpix import healpix_npix
 
 
 def test_load_object_df(lc_dr19_single_file):
@@ -19,3 +20,16 @@ def test_load_source_df(lc_dr19_single_file):
     assert set(df.columns) == set(columns.SOURCE_COLUMNS)
     for column, dtype in zip(df.columns, df.dtypes):
         assert is_numeric_dtype(dtype), f"Column {column} is not numeric, but {dtype}"
+
+
+def test_load_object_df_healpix(lc_dr19_single_file):
+    df = pandas.load_object_df(lc_dr19_single_file, columns=['nepochs'], healpix_order=10)
+    assert set(df.columns) == {'nepochs', columns.HEALPIX_COLUMN}
+    assert df[columns.HEALPIX_COLUMN].between(0, healpix_npix(10) - 1).all()
+
+
+def test_load_source_df_healpix(lc_dr19_single_file):
+    objects = pandas.load_object_df(lc_dr19_single_file, healpix_order=10)
+    sources = pandas.load_source_df(lc_dr19_single_file, healpix_order=10)
+    assert set(sources.columns) == set(columns.SOURCE_COLUMNS) | {columns.HEALPIX_COLUMN}
+    assert (sources[columns.HEALPIX_COLUMN] == objects[columns.HEALPIX_COLUMN].loc[sources.index]).all()
@@ -0,0 +1,138 @@
+import json
+import shutil
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+from numpy.testing import assert_array_equal
+
+from load_ztfdr_for_tape import columns
+from load_ztfdr_for_tape.dask import (derive_dd_divisions, load_object_frame,
+                                      load_object_source_frames_from_path,
+                                      load_source_frame)
+from load_ztfdr_for_tape.filepath import get_ordered_paths
+from load_ztfdr_for_tape.relayout import (MANIFEST_FILENAME, OptimizedLayout,
+                                          RelayoutOptions, main, relayout)
+
+
+def test_relayout(lc_dr19, tmp_path):
+    options = RelayoutOptions(row_group_size=1000, compression='zstd', explode_sources=True)
+    layout = relayout(lc_dr19, tmp_path, options=options, max_workers=2)
+
+    assert layout.complete
+    assert OptimizedLayout.from_dir(tmp_path) == layout
+    assert len(layout.files) == len(list(lc_dr19.glob('**/*.parquet')))
+
+    for file, path in zip(layout.files, layout.nested_paths):
+        parquet_file = pq.ParquetFile(path)
+        metadata = parquet_file.metadata
+        assert metadata.num_rows == file.num_rows
+        assert metadata.num_row_groups == -(-file.num_rows // options.row_group_size)
+        assert metadata.row_group(0).column(0).compression == 'ZSTD'
+        assert metadata.row_group(0).column(0).statistics.has_min_max
+        assert columns.UNUSED_COLUMNS[0] not in parquet_file.schema_arrow.names
+
+        oids = parquet_file.read(columns=[columns.ID_COLUMN])[columns.ID_COLUMN].to_numpy()
+        assert np.all(np.diff(oids) > 0)
+        assert file.min_oid == oids[0]
+        assert file.max_oid == oids[-1]
+
+    for file, path in zip(layout.files, layout.source_paths):
+        assert pq.read_metadata(path).num_rows == file.num_sources
+
+
+def test_relayout_resume(lc_dr19, tmp_path):
+    layout = relayout(lc_dr19, tmp_path)
+    mtimes = [path.stat().st_mtime_ns for path in layout.nested_paths]
+
+    # Emulate an interrupted run
+    layout.nested_paths[-1].unlink()
+    layout.complete = False
+    layout.write_manifest()
+    with pytest.raises(ValueError):
+        OptimizedLayout.from_dir(tmp_path)
+
+    resumed = relayout(lc_dr19, tmp_path)
+    assert resumed.complete
+    assert resumed.files == layout.files
+    assert [path.stat().st_mtime_ns for path in resumed.nested_paths][:-1] == mtimes[:-1]
+
+
+def test_relayout_different_options(lc_dr19, tmp_path):
+    relayout(lc_dr19, tmp_path)
+    with pytest.raises(ValueError):
+        relayout(lc_dr19, tmp_path, options=RelayoutOptions(compression='snappy'))
+
+
+@pytest.mark.parametrize('output_subdir', ['.', 'opt'])
+def test_relayout_output_inside_input(lc_dr19, tmp_path, output_subdir):
+    input_path = tmp_path / 'input'
+    shutil.copytree(lc_dr19, input_path)
+    with pytest.raises(ValueError):
+        relayout(input_path, input_path / output_subdir)
+    assert not (input_path / output_subdir / MANIFEST_FILENAME).exists()
+
+
+def test_relayout_interrupted(lc_dr19, tmp_path, monkeypatch):
+    calls = []
+
+    def interrupted(*_args, **_kwargs):
+        calls.append(None)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr('load_ztfdr_for_tape.relayout._relayout_file', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        relayout(lc_dr19, tmp_path, max_workers=1)
+    # Queued files are not started
+    assert len(calls) == 1
+    assert not OptimizedLayout.from_dir(tmp_path, allow_incomplete=True).complete
+
+
+def test_relayout_cli(lc_dr19, tmp_path):
+    main([str(lc_dr19), str(tmp_path), '--row-group-size', '100', '--explode-sources', '-j', '1'])
+    with open(tmp_path / MANIFEST_FILENAME, encoding='utf-8') as fh:
+        manifest = json.load(fh)
+    assert manifest['complete']
+    assert manifest['options']['row_group_size'] == 100
+    assert manifest['options']['explode_sources']
+
+
+@pytest.mark.parametrize('explode_sources', [False, True])
+def test_loaders_use_optimized_layout(lc_dr19, tmp_path, explode_sources):
+    relayout(lc_dr19, tmp_path, options=RelayoutOptions(row_group_size=1000, explode_sources=explode_sources))
+
+    original_objects = load_object_frame(lc_dr19).compute().sort_index()
+    objects = load_object_frame(tmp_path)
+    assert objects.npartitions == len(list(lc_dr19.glob('**/*.parquet')))
+    objects_computed = objects.compute()
+    assert objects_computed.index.is_monotonic_increasing
+    assert_array_equal(objects_computed.index, original_objects.index)
+    assert set(objects_computed.columns) == set(columns.OBJECT_COLUMNS)
+
+    original_sources = load_source_frame(lc_dr19).compute()
+    sources_computed = load_source_frame(tmp_path).compute()
+    assert set(sources_computed.columns) == set(columns.SOURCE_COLUMNS)
+    assert sources_computed.shape == original_sources.shape
+    assert_array_equal(np.unique(sources_computed.index), np.unique(original_sources.index))
+
+    objects, sources = load_object_source_frames_from_path(tmp_path)
+    assert objects.divisions == sources.divisions
+
+
+def test_get_ordered_paths_optimized_layout(lc_dr19, tmp_path):
+    layout = relayout(lc_dr19, tmp_path, options=RelayoutOptions(explode_sources=True))
+
+    ordered_paths = get_ordered_paths(tmp_path)
+    assert ordered_paths == layout.nested_paths
+
+    objects = load_object_frame(ordered_paths)
+    assert objects.divisions == load_object_frame(lc_dr19).divisions
+
+
+def test_derive_dd_divisions_duplicates(lc_dr19, tmp_path):
+    layout = relayout(lc_dr19, tmp_path, options=RelayoutOptions(explode_sources=True))
+    # Both nested and exploded files
+    all_paths = list(tmp_path.glob('**/*.parquet'))
+    assert len(all_paths) == 2 * len(layout.files)
+    with pytest.raises(ValueError):
+        derive_dd_divisions(get_ordered_paths(all_paths))
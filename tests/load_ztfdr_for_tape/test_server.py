@@ -0,0 +1,145 @@
+import json
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from load_ztfdr_for_tape import columns
+from load_ztfdr_for_tape.pandas import load_object_df
+from load_ztfdr_for_tape.relayout import RelayoutOptions, relayout
+from load_ztfdr_for_tape.server import LightCurveStore, make_server
+
+MISSING_OID = 202112100021232  # Larger than any OID in the file
+
+
+@pytest.fixture
+def objects(lc_dr19_single_file):
+    return load_object_df(lc_dr19_single_file)
+
+
+def check_record(record, objects, oid):
+    assert record[columns.ID_COLUMN] == oid
+    for column in columns.OBJECT_COLUMNS:
+        assert record[column] == pytest.approx(objects.loc[oid, column])
+    for column in columns.SOURCE_COLUMNS:
+        assert column in record
+    assert len(record['hmjd']) == record['nepochs']
+
+
+def test_get(lc_dr19, objects):
+    store = LightCurveStore(lc_dr19)
+    oid = objects.index[10]
+    check_record(store.get(oid), objects, oid)
+    assert store.get(MISSING_OID) is None
+    # No such file
+    assert store.get(633207400004730) is None
+
+
+def test_get_many(lc_dr19, objects):
+    store = LightCurveStore(lc_dr19)
+    oids = [objects.index[5], MISSING_OID, objects.index[0], objects.index[5]]
+    records = store.get_many(oids)
+    assert records[1] is None
+    for oid, record in zip(oids, records):
+        if oid != MISSING_OID:
+            check_record(record, objects, oid)
+
+    stats = store.stats
+    assert stats.footer_misses == 1
+    assert stats.footer_hits == 0
+    assert stats.row_group_misses == 1
+
+
+def test_caches(lc_dr19, objects):
+    store = LightCurveStore(lc_dr19)
+    store.get(objects.index[0])
+    store.get(objects.index[1])
+    stats = store.stats
+    assert stats.footer_misses == 1
+    assert stats.footer_hits == 1
+    assert stats.row_group_misses == 1
+    assert stats.row_group_hits == 1
+    assert stats.row_group_cache_bytes > 0
+
+
+def test_row_group_cache_is_bounded(lc_dr19, objects, tmp_path):
+    relayout(lc_dr19, tmp_path, options=RelayoutOptions(row_group_size=100))
+    store = LightCurveStore(tmp_path, max_row_group_bytes=200_000)
+    for oid in objects.index[::100]:
+        check_record(store.get(oid), objects, oid)
+        assert store.stats.row_group_cache_bytes <= 200_000
+    assert store.stats.row_group_misses == len(objects.index[::100])
+
+
+def test_concurrent_requests_are_coalesced(lc_dr19, objects):
+    store = LightCurveStore(lc_dr19)
+    n = 16
+    barrier = threading.Barrier(n)
+
+    def get(oid):
+        barrier.wait()
+        return store.get(oid)
+
+    with ThreadPoolExecutor(n) as executor:
+        records = list(executor.map(get, objects.index[:n]))
+
+    for oid, record in zip(objects.index[:n], records):
+        check_record(record, objects, oid)
+    stats = store.stats
+    assert stats.row_group_misses == 1
+    assert stats.row_group_hits + stats.row_group_coalesced == n - 1
+
+
+def test_http(lc_dr19, objects):
+    store = LightCurveStore(lc_dr19)
+    with make_server(store) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        host, port = server.server_address
+        url = f'http://{host}:{port}'
+        try:
+            oid = objects.index[3]
+            with urlopen(f'{url}/object/{oid}') as response:
+                check_record(json.load(response), objects, oid)
+
+            with urlopen(f'{url}/objects?oid={oid}&oid={MISSING_OID}') as response:
+                records = json.load(response)
+            check_record(records[0], objects, oid)
+            assert records[1] is None
+
+            with pytest.raises(HTTPError) as exc_info, urlopen(f'{url}/object/{MISSING_OID}'):
+                pass
+            assert exc_info.value.code == 404
+
+            with pytest.raises(HTTPError) as exc_info, urlopen(f'{url}/object/not-an-oid'):
+                pass
+            assert exc_info.value.code == 400
+
+            with urlopen(f'{url}/stats') as response:
+                assert json.load(response)['row_group_misses'] == 1
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def test_http_unreadable_file(lc_dr19_single_file, objects, tmp_path):
+    file_path = tmp_path / lc_dr19_single_file.name
+    shutil.copy(lc_dr19_single_file, file_path)
+    store = LightCurveStore([file_path])
+    file_path.unlink()
+    with make_server(store) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        host, port = server.server_address
+        url = f'http://{host}:{port}'
+        try:
+            with pytest.raises(HTTPError) as exc_info, urlopen(f'{url}/object/{objects.index[0]}'):
+                pass
+            assert exc_info.value.code == 500
+            assert 'error' in json.load(exc_info.value)
+        finally:
+            server.shutdown()
+            thread.join()
@@ -0,0 +1,84 @@
+import dask
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from load_ztfdr_for_tape import columns
+from load_ztfdr_for_tape.dask import (derive_dd_divisions,
+                                      load_frame_from_path,
+                                      load_object_source_frames_by_healpix,
+                                      load_object_source_frames_from_path)
+from load_ztfdr_for_tape.filepath import get_ordered_paths
+from load_ztfdr_for_tape.pandas import load_object_df, load_source_df
+from load_ztfdr_for_tape.sync import sync_object_source_frames
+
+
+def test_sync_filtered_objects(lc_dr19):
+    objects, sources = load_object_source_frames_from_path(lc_dr19)
+    filtered_objects = objects[objects[columns.NEPOCHS_COLUMN] > 10]
+
+    synced_objects, synced_sources = sync_object_source_frames(filtered_objects, sources)
+    assert synced_objects.divisions == synced_sources.divisions == objects.divisions
+
+    objects_computed, sources_computed = dask.compute(synced_objects, synced_sources)
+    assert len(objects_computed) > 0
+    assert_array_equal(np.unique(sources_computed.index), objects_computed.index)
+    counts = sources_computed.index.value_counts().reindex(objects_computed.index)
+    assert_array_equal(objects_computed[columns.NEPOCHS_COLUMN], counts)
+
+
+def test_sync_filtered_sources(lc_dr19):
+    objects, sources = load_object_source_frames_from_path(lc_dr19)
+    filtered_sources = sources[sources['catflags'] == 0]
+
+    synced_objects, synced_sources = sync_object_source_frames(
+        objects, filtered_sources, drop_empty_objects=True, validate=True
+    )
+
+    objects_computed, sources_computed = dask.compute(synced_objects, synced_sources)
+    assert (sources_computed['catflags'] == 0).all()
+    assert_array_equal(np.unique(sources_computed.index), objects_computed.index)
+    assert (objects_computed[columns.NEPOCHS_COLUMN] > 0).all()
+    assert objects_computed[columns.NEPOCHS_COLUMN].sum() == len(sources_computed)
+    assert objects_computed[columns.NEPOCHS_COLUMN].dtype == objects.dtypes[columns.NEPOCHS_COLUMN]
+
+
+def test_sync_keep_nepochs(lc_dr19):
+    objects, sources = load_object_source_frames_from_path(lc_dr19)
+    synced_objects, _synced_sources = sync_object_source_frames(objects, sources, recompute_nepochs=False)
+    assert synced_objects is objects
+
+
+def test_sync_different_divisions(lc_dr19):
+    objects, sources = load_object_source_frames_from_path(lc_dr19)
+
+    with pytest.raises(ValueError):
+        sync_object_source_frames(objects.clear_divisions(), sources)
+    with pytest.raises(ValueError):
+        sync_object_source_frames(objects.partitions[1:], sources.partitions[:-1])
+
+
+def test_sync_healpix_index(lc_dr19):
+    objects, sources = load_object_source_frames_by_healpix(lc_dr19, order=4, partition_order=1)
+    assert objects.divisions == sources.divisions
+    filtered_objects = objects[objects[columns.NEPOCHS_COLUMN] > 50]
+
+    # Divisions are equal, but sources of an object may be matched by the pixel only
+    with pytest.raises(ValueError, match='indexed by'):
+        sync_object_source_frames(filtered_objects, sources)
+
+
+def test_sync_validate(lc_dr19):
+    ordered_paths = get_ordered_paths(lc_dr19)
+    divisions = derive_dd_divisions(ordered_paths)
+    # Wrong divisions, files are in the reversed order
+    kwargs = {'ordered_paths': ordered_paths[::-1], 'divisions': divisions, 'meta': None}
+    objects = load_frame_from_path(load_object_df, **kwargs)
+    sources = load_frame_from_path(load_source_df, **kwargs)
+
+    _synced_objects, synced_sources = sync_object_source_frames(objects, sources)
+    synced_sources.compute()
+
+    _synced_objects, synced_sources = sync_object_source_frames(objects, sources, validate=True)
+    with pytest.raises(ValueError):
+        synced_sources.compute()